@@ -0,0 +1,22 @@
+from tiny_agent import MessageParser, TaskState, TextBlock, ToolUseBlock
+
+
+def feed_in_chunks(message, size):
+    state = TaskState()
+    parser = MessageParser(state)
+    for i in range(0, len(message), size):
+        parser.feed(message[i:i + size])
+    parser.finish()
+    return state.assistant_message_content
+
+
+def test_unclosed_tool_tag_does_not_swallow_later_tool_calls():
+    message = "I'll list first with <list_files>, then read.\n<read_file>\n<path>a.py</path>\n</read_file>"
+    expected = [
+        TextBlock(content="I'll list first with <list_files>, then read."),
+        ToolUseBlock(name="read_file", params={"path": "a.py"}),
+    ]
+
+    assert MessageParser.parse_assistant_message(message) == expected
+    for size in (1, 3, 7):
+        assert feed_in_chunks(message, size) == expected
@@ -5,13 +5,17 @@ A simplified coding agent with conversation loop, tool execution, and streaming.
 
 Based on the original Cline architecture: https://github.com/cline/cline
 
-Setup: pip install anthropic && export ANTHROPIC_API_KEY="your-key"
+Setup (Python 3.10+): pip install anthropic && export ANTHROPIC_API_KEY="your-key"
+Optional: export CLINE_CACHE_RESPONSES=1 to replay identical requests from memory
 Usage: python cline_core.py
 """
 
 import asyncio
+import hashlib
 import json
 import re
+import sys
+import threading
 import time
 import os
 from pathlib import Path
@@ -26,75 +30,207 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
     print("Install anthropic: pip install anthropic")
 
+# All JSON serialization goes through json_dumps, using orjson when installed
+try:
+    import orjson
+    
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
 
-@dataclass
+
+@dataclass(slots=True)
 class TextBlock:
     type: str = "text"
     content: str = ""
     partial: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolUseBlock:
     type: str = "tool_use"
     name: str = ""
-    params: Dict = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
     partial: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class StreamChunk:
     type: str
     text: Optional[str] = None
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    from_cache: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskState:
     is_streaming: bool = False
     current_streaming_content_index: int = 0
     assistant_message_content: List[Union[TextBlock, ToolUseBlock]] = field(default_factory=list)
     user_message_content: List[Dict] = field(default_factory=list)
     user_message_content_ready: bool = False
+    user_message_content_ready_event: asyncio.Event = field(default_factory=asyncio.Event)
     abort: bool = False
+    # Characters of the streamed message consumed by the parser so far
+    parser_cursor: int = 0
+    parser_state: Optional[str] = None
+
+
+TOOL_NAMES = frozenset({"read_file", "write_to_file", "execute_command", "list_files", "attempt_completion"})
+_MAX_TOOL_TAG_LEN = max(len(name) for name in TOOL_NAMES) + 2
+# Opening tags only: close tags are located with str.find, which keeps the
+# pattern free of backreferences and lazy captures
+_PARAM_OPEN_RE = re.compile(r'<(\w+)>')
 
 
 class MessageParser:
+    def __init__(self, task_state: TaskState):
+        self.task_state = task_state
+        # Scanned raw text of the current block, joined only when the block closes
+        self.parts: List[str] = []
+        # Unscanned tail that may still hold the start of a tag
+        self.buffer = ""
+        # Raw text and opening tag consumed when the current tool block started
+        self.tool_prefix = ""
+    
     @staticmethod
     def parse_assistant_message(message: str) -> List[Union[TextBlock, ToolUseBlock]]:
-        content_blocks = []
-        tool_pattern = r'<(read_file|write_to_file|execute_command|list_files|attempt_completion)>(.*?)</\1>'
-        last_end = 0
+        # Plain prose can't contain a tool tag
+        if '<' not in message:
+            text = message.strip()
+            return [TextBlock(content=text)] if text else []
         
-        for match in re.finditer(tool_pattern, message, re.DOTALL):
-            start, end = match.span()
-            
-            if start > last_end:
-                text_content = message[last_end:start].strip()
-                if text_content:
-                    content_blocks.append(TextBlock(content=text_content))
-            
-            tool_name = match.group(1)
-            tool_content = match.group(2).strip()
-            
-            params = {}
-            param_pattern = r'<(\w+)>(.*?)</\1>'
-            for param_match in re.finditer(param_pattern, tool_content, re.DOTALL):
-                params[param_match.group(1)] = param_match.group(2).strip()
-
-            content_blocks.append(ToolUseBlock(name=tool_name, params=params))
-            last_end = end
+        parser = MessageParser(TaskState())
+        parser.feed(message)
+        parser.finish()
+        return parser.task_state.assistant_message_content
+    
+    @staticmethod
+    def parse_params(tool_content: str) -> Dict[str, str]:
+        params: Dict[str, str] = {}
+        pos = 0
+        while (match := _PARAM_OPEN_RE.search(tool_content, pos)):
+            name = match.group(1)
+            close = tool_content.find(f"</{name}>", match.end())
+            if close == -1:
+                pos = match.start() + 1
+                continue
+            params[name] = tool_content[match.end():close].strip()
+            pos = close + len(name) + 3
+        return params
+    
+    def feed(self, text: str) -> None:
+        # Scanner state is kept in locals and written back once per call
+        state = self.task_state
+        blocks = state.assistant_message_content
+        parts = self.parts
+        buffer = self.buffer + text
+        cursor = 0
+        tool_name = state.parser_state
+        
+        while True:
+            if tool_name is None:
+                start = buffer.find('<', cursor)
+                if start == -1:
+                    cursor = len(buffer)
+                    break
+                
+                end = buffer.find('>', start + 1, start + _MAX_TOOL_TAG_LEN)
+                if end == -1:
+                    if len(buffer) - start < _MAX_TOOL_TAG_LEN:
+                        # Tag may still be arriving, resume here on the next chunk
+                        cursor = start
+                        break
+                    cursor = start + 1
+                    continue
+                
+                name = buffer[start + 1:end]
+                if name not in TOOL_NAMES:
+                    cursor = start + 1
+                    continue
+                
+                parts.append(buffer[:start])
+                text_before = "".join(parts)
+                parts.clear()
+                self._close_text(text_before)
+                blocks.append(ToolUseBlock(name=name, partial=True))
+                self.tool_prefix = text_before + buffer[start:end + 1]
+                state.parser_cursor += end + 1
+                buffer = buffer[end + 1:]
+                cursor = 0
+                tool_name = name
+            else:
+                close_tag = f"</{tool_name}>"
+                end = buffer.find(close_tag, cursor)
+                if end == -1:
+                    cursor = max(0, len(buffer) - len(close_tag) + 1)
+                    break
+                
+                parts.append(buffer[:end])
+                block = blocks[-1]
+                block.params = self.parse_params("".join(parts))
+                block.partial = False
+                parts.clear()
+                state.parser_cursor += end + len(close_tag)
+                buffer = buffer[end + len(close_tag):]
+                cursor = 0
+                tool_name = None
+        
+        # Move the scanned text out of the buffer so later chunks don't copy it again
+        if cursor:
+            parts.append(buffer[:cursor])
+            state.parser_cursor += cursor
+            buffer = buffer[cursor:]
         
-        if last_end < len(message):
-            remaining_text = message[last_end:].strip()
-            if remaining_text:
-                content_blocks.append(TextBlock(content=remaining_text))
+        self.buffer = buffer
+        state.parser_state = tool_name
         
-        if not content_blocks and message.strip():
-            content_blocks.append(TextBlock(content=message.strip()))
+        # A partial text block's content is filled in when the block closes
+        if tool_name is None and not (blocks and isinstance(blocks[-1], TextBlock) and blocks[-1].partial):
+            if buffer.strip() or any(part.strip() for part in parts):
+                blocks.append(TextBlock(partial=True))
+    
+    def finish(self) -> None:
+        state = self.task_state
+        blocks = state.assistant_message_content
         
-        return content_blocks
+        while state.parser_state is not None:
+            # Unterminated tool tag: keep the opener as text and rescan what
+            # followed it, since later tool calls may still be complete
+            blocks.pop()
+            if self.tool_prefix[:-len(state.parser_state) - 2].strip():
+                blocks.pop()
+            
+            scanned = "".join(self.parts)
+            rest = scanned + self.buffer
+            state.parser_cursor -= len(scanned)
+            self.parts = [self.tool_prefix]
+            self.buffer = ""
+            state.parser_state = None
+            self.feed(rest)
+        
+        self._close_text("".join(self.parts) + self.buffer)
+        state.parser_cursor += len(self.buffer)
+        self.parts = []
+        self.buffer = ""
+        self.tool_prefix = ""
+    
+    def _close_text(self, text: str) -> None:
+        blocks = self.task_state.assistant_message_content
+        content = text.strip()
+        if blocks and isinstance(blocks[-1], TextBlock) and blocks[-1].partial:
+            if content:
+                blocks[-1].content = content
+                blocks[-1].partial = False
+            else:
+                blocks.pop()
+        elif content:
+            blocks.append(TextBlock(content=content))
 
 
 class APIProvider(ABC):
@@ -112,15 +248,38 @@ class AnthropicAPIProvider(APIProvider):
         if not self.api_key:
             raise ValueError("Set ANTHROPIC_API_KEY environment variable")
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Pooled keep-alive connections let later turns skip the TCP/TLS handshake.
+        # The Limits class is taken from the SDK's own default so it matches the
+        # HTTP library the installed SDK is built on.
+        connection_limits = type(anthropic.DEFAULT_CONNECTION_LIMITS)
+        self.client = anthropic.Anthropic(
+            api_key=self.api_key,
+            http_client=anthropic.DefaultHttpxClient(
+                limits=connection_limits(max_keepalive_connections=10, max_connections=20),
+                timeout=anthropic.Timeout(60.0, connect=5.0)
+            )
+        )
     
     async def create_message_stream(self, system_prompt: str, messages: List[Dict]) -> AsyncGenerator[StreamChunk, None]:
-        anthropic_messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        # History dicts already have the API's role/content shape, so they are sent
+        # as-is. Cache breakpoints: the static system prompt, and the last message
+        # before the new user turn. That turn isn't kept in the conversation
+        # history, so only the prefix ending before it repeats on the next request
+        anthropic_messages = messages
+        if len(messages) >= 2:
+            anthropic_messages = messages[:-2] + [{
+                "role": messages[-2]["role"],
+                "content": [{
+                    "type": "text",
+                    "text": messages[-2]["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }, messages[-1]]
         
         with self.client.messages.stream(
             model="claude-sonnet-4-20250514",
             max_tokens=4096,
-            system=system_prompt,
+            system=[{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
             messages=anthropic_messages,
         ) as stream:
             for text in stream.text_stream:
@@ -130,43 +289,112 @@ class AnthropicAPIProvider(APIProvider):
             yield StreamChunk(
                 type="usage",
                 input_tokens=message.usage.input_tokens,
-                output_tokens=message.usage.output_tokens
+                output_tokens=message.usage.output_tokens,
+                cache_write_tokens=message.usage.cache_creation_input_tokens,
+                cache_read_tokens=message.usage.cache_read_input_tokens
             )
 
 
+class CachingAPIProvider(APIProvider):
+    def __init__(self, inner: APIProvider, max_entries: int = 64):
+        self.inner = inner
+        self.max_entries = max_entries
+        self._cache: Dict[str, str] = {}
+    
+    async def create_message_stream(self, system_prompt: str, messages: List[Dict]) -> AsyncGenerator[StreamChunk, None]:
+        key = hashlib.sha256(json_dumps([system_prompt, messages]).encode()).hexdigest()
+        
+        cached = self._cache.get(key)
+        if cached is not None:
+            # Usage goes first so the replay is reported even if the consumer
+            # stops reading partway through the text
+            yield StreamChunk(type="usage", input_tokens=0, output_tokens=0, from_cache=True)
+            yield StreamChunk(type="text", text=cached)
+            return
+        
+        texts = []
+        try:
+            async for chunk in self.inner.create_message_stream(system_prompt, messages):
+                if chunk.type == "text" and chunk.text:
+                    texts.append(chunk.text)
+                yield chunk
+        except GeneratorExit:
+            # _make_request stops reading once attempt_completion runs; a reply cut
+            # short after a complete tool call is still worth replaying
+            text = "".join(texts)
+            if any(isinstance(block, ToolUseBlock) for block in MessageParser.parse_assistant_message(text)):
+                self._store(key, text)
+            raise
+        
+        self._store(key, "".join(texts))
+    
+    def _store(self, key: str, text: str) -> None:
+        if len(self._cache) >= self.max_entries:
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = text
+
 class ToolExecutor:
-    def __init__(self, cwd: str = "."):
+    READ_CACHE_SIZE = 256
+    MAX_COMMAND_OUTPUT = 65536
+    
+    def __init__(self, cwd: str = ".", max_read: int = 65536):
         self.cwd = Path(cwd)
+        # Upper bound on the characters read_file returns, so one large file can't
+        # blow up the size of a tool result
+        self.max_read = max_read
+        # Keyed on (tool, absolute path, mtime_ns[, size]) so any change on disk misses
+        self._read_cache: Dict[tuple, str] = {}
+        # Tool name -> handler taking the tool's params
+        self._dispatch = {
+            "read_file": lambda params: self._read_file(params.get("path", "")),
+            "write_to_file": lambda params: self._write_file(params.get("path", ""), params.get("content", "")),
+            "execute_command": lambda params: self._execute_command(params.get("command", "")),
+            "list_files": lambda params: self._list_files(params.get("path", ".")),
+            "attempt_completion": self._attempt_completion,
+        }
     
     async def execute_tool(self, tool: ToolUseBlock) -> str:
+        handler = self._dispatch.get(tool.name)
+        if handler is None:
+            return f"Unknown tool: {tool.name}"
         try:
-            if tool.name == "read_file":
-                return await self._read_file(tool.params.get("path", ""))
-            elif tool.name == "write_to_file":
-                return await self._write_file(tool.params.get("path", ""), tool.params.get("content", ""))
-            elif tool.name == "execute_command":
-                return await self._execute_command(tool.params.get("command", ""))
-            elif tool.name == "list_files":
-                return await self._list_files(tool.params.get("path", "."))
-            elif tool.name == "attempt_completion":
-                return f"Task completed: {tool.params.get('result', 'Done')}"
-            else:
-                return f"Unknown tool: {tool.name}"
+            return await handler(tool.params)
         except Exception as e:
             return f"Error: {str(e)}"
     
+    async def _attempt_completion(self, params: Dict[str, str]) -> str:
+        return f"Task completed: {params.get('result', 'Done')}"
+    
     async def _read_file(self, path: str) -> str:
         file_path = self.cwd / path
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        st = os.stat(file_path)
+        key = ("read_file", os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        content = self._read_cache.get(key)
+        if content is None:
+            # Blocking file I/O runs on a worker thread so streaming isn't stalled
+            content, truncated = await asyncio.to_thread(self._read_text, file_path, self.max_read)
+            if truncated:
+                content += f"\n... [truncated, {st.st_size} bytes total] ...\n"
+            self._cache_put(key, content)
         return f"File contents of {path}:\n```\n{content}\n```"
     
     async def _write_file(self, path: str, content: str) -> str:
         file_path = self.cwd / path
+        await asyncio.to_thread(self._write_text, file_path, content)
+        self._invalidate(file_path)
+        return f"Wrote {len(content)} characters to {path}"
+    
+    @staticmethod
+    def _read_text(file_path: Path, limit: int) -> tuple:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read(limit)
+            return content, bool(f.read(1))
+    
+    @staticmethod
+    def _write_text(file_path: Path, content: str) -> None:
         file_path.parent.mkdir(parents=True, exist_ok=True)
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
-        return f"Wrote {len(content)} characters to {path}"
     
     async def _execute_command(self, command: str) -> str:
         process = await asyncio.create_subprocess_shell(
@@ -175,28 +403,115 @@ class ToolExecutor:
             stderr=asyncio.subprocess.PIPE,
             cwd=self.cwd
         )
-        stdout, stderr = await process.communicate()
+        stdout, stderr = await asyncio.gather(self._drain(process.stdout), self._drain(process.stderr))
+        await process.wait()
         
         result = []
         if stdout:
-            result.append(f"STDOUT:\n{stdout.decode()}")
+            result.append(f"STDOUT:\n{stdout}")
         if stderr:
-            result.append(f"STDERR:\n{stderr.decode()}")
+            result.append(f"STDERR:\n{stderr}")
         result.append(f"Exit code: {process.returncode}")
         return "\n".join(result)
     
+    async def _drain(self, stream: asyncio.StreamReader) -> str:
+        # Only the tail is kept, so a noisy command can't balloon the tool result
+        buf = bytearray()
+        total = 0
+        while data := await stream.read(65536):
+            total += len(data)
+            buf += data
+            if len(buf) > self.MAX_COMMAND_OUTPUT:
+                del buf[:-self.MAX_COMMAND_OUTPUT]
+        
+        text = buf.decode(errors="replace")
+        if total > len(buf):
+            text = f"... [truncated, {total} bytes total] ...\n{text}"
+        return text
+    
     async def _list_files(self, path: str) -> str:
         dir_path = self.cwd / path
-        if not dir_path.exists():
+        try:
+            st = os.stat(dir_path)
+        except OSError:
             return f"Directory {path} does not exist"
         
-        files = []
-        for item in sorted(dir_path.iterdir()):
-            if item.is_dir():
-                files.append(f"📁 {item.name}/")
-            else:
-                files.append(f"📄 {item.name}")
-        return f"Contents of {path}:\n" + "\n".join(files)
+        # A directory's mtime changes whenever an entry is added, removed or renamed
+        key = ("list_files", os.path.abspath(dir_path), st.st_mtime_ns)
+        listing = self._read_cache.get(key)
+        if listing is None:
+            # DirEntry caches the file type from the directory read, so is_dir()
+            # only needs an extra stat for symlinks
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda item: item.name)
+            listing = "\n".join(
+                f"📁 {item.name}/" if item.is_dir() else f"📄 {item.name}" for item in entries
+            )
+            self._cache_put(key, listing)
+        return f"Contents of {path}:\n" + listing
+    
+    def _invalidate(self, file_path: Path) -> None:
+        # mtime_ns can repeat within the filesystem's timestamp granularity, so a
+        # write drops the file's entries and the listings of the directories above it
+        # (mkdir may have added entries to any of them) instead of relying on the key
+        path = os.path.abspath(file_path)
+        stale = [
+            key for key in self._read_cache
+            if (key[0] == "read_file" and key[1] == path)
+            or (key[0] == "list_files" and path.startswith(key[1].rstrip(os.sep) + os.sep))
+        ]
+        for key in stale:
+            del self._read_cache[key]
+    
+    def _cache_put(self, key: tuple, value: str) -> None:
+        if len(self._read_cache) >= self.READ_CACHE_SIZE:
+            # Dicts keep insertion order, so this evicts the oldest entry
+            del self._read_cache[next(iter(self._read_cache))]
+        self._read_cache[key] = value
+
+
+async def ainput(prompt: str = "") -> str:
+    # input() blocks, so read on a thread to keep the event loop running. The thread
+    # is a daemon rather than an executor worker so Ctrl+C at a prompt exits at once.
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def deliver(method, value) -> None:
+        if not future.done():
+            method(value)
+    
+    def read() -> None:
+        try:
+            result = (future.set_result, input(prompt))
+        except Exception as e:
+            result = (future.set_exception, e)
+        try:
+            loop.call_soon_threadsafe(deliver, *result)
+        except RuntimeError:
+            pass  # Event loop already closed
+    
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+
+class CoalescingBuffer:
+    # Streamed chunks are often a single token; batching them per window means one
+    # write, one parse step and one presentation pass per window instead of per token
+    def __init__(self, window: float = 0.016):
+        self.window = window
+        self.pending: List[str] = []
+        self.last_flush = time.monotonic()
+    
+    def add(self, text: str) -> bool:
+        self.pending.append(text)
+        # A '>' may close a tool tag, which should run without waiting out the window
+        return '>' in text or time.monotonic() - self.last_flush >= self.window
+    
+    def drain(self) -> str:
+        text = "".join(self.pending)
+        self.pending.clear()
+        self.last_flush = time.monotonic()
+        return text
 
 
 class Task:
@@ -264,6 +579,10 @@ Use tools systematically to complete tasks. Call attempt_completion when finishe
         self.task_state.assistant_message_content = []
         self.task_state.user_message_content = []
         self.task_state.user_message_content_ready = False
+        self.task_state.user_message_content_ready_event.clear()
+        self.task_state.parser_cursor = 0
+        self.task_state.parser_state = None
+        parser = MessageParser(self.task_state)
         
         # Prepare messages
         messages = self.conversation_history.copy()
@@ -273,23 +592,40 @@ Use tools systematically to complete tasks. Call attempt_completion when finishe
         print("\n🤖 Thinking...")
         
         # Stream response
-        assistant_message = ""
+        assistant_chunks: List[str] = []
+        coalescer = CoalescingBuffer()
         self.task_state.is_streaming = True
         
+        async def flush() -> None:
+            text = coalescer.drain()
+            assistant_chunks.append(text)
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            
+            parser.feed(text)
+            await self._present_content()
+        
         try:
             async for chunk in self.api_provider.create_message_stream(self.system_prompt, messages):
                 if chunk.type == "text" and chunk.text:
-                    assistant_message += chunk.text
-                    print(chunk.text, end="", flush=True)
-                    
-                    self.task_state.assistant_message_content = MessageParser.parse_assistant_message(assistant_message)
-                    await self._present_content()
+                    if coalescer.add(chunk.text):
+                        await flush()
                     
                     if self.task_state.abort:
                         break
                 
                 elif chunk.type == "usage":
-                    print(f"\n📊 {chunk.input_tokens} in, {chunk.output_tokens} out")
+                    if coalescer.pending:
+                        await flush()
+                    usage = f"\n📊 {chunk.input_tokens} in, {chunk.output_tokens} out"
+                    if chunk.from_cache:
+                        usage += " (replayed from cache)"
+                    if chunk.cache_read_tokens or chunk.cache_write_tokens:
+                        usage += f" (cache: {chunk.cache_read_tokens or 0} read, {chunk.cache_write_tokens or 0} written)"
+                    print(usage)
+            
+            if coalescer.pending and not self.task_state.abort:
+                await flush()
         
         except Exception as e:
             print(f"\n❌ Error: {e}")
@@ -304,17 +640,17 @@ Use tools systematically to complete tasks. Call attempt_completion when finishe
             return True
         
         # Finalize content
-        for block in self.task_state.assistant_message_content:
-            block.partial = False
+        parser.finish()
         await self._present_content()
         
-        while not self.task_state.user_message_content_ready and not self.task_state.abort:
-            await asyncio.sleep(0.1)
+        if not self.task_state.abort:
+            await self.task_state.user_message_content_ready_event.wait()
         
         if self.task_state.abort:
             return True
         
         # Add to history
+        assistant_message = "".join(assistant_chunks)
         if assistant_message:
             self.conversation_history.append({"role": "assistant", "content": assistant_message})
             
@@ -324,64 +660,71 @@ Use tools systematically to complete tasks. Call attempt_completion when finishe
         
         return True
     
+    def _mark_user_message_content_ready(self) -> None:
+        self.task_state.user_message_content_ready = True
+        self.task_state.user_message_content_ready_event.set()
+    
     async def _present_content(self) -> None:
         if self.task_state.current_streaming_content_index >= len(self.task_state.assistant_message_content):
             if not self.task_state.is_streaming:
-                self.task_state.user_message_content_ready = True
+                self._mark_user_message_content_ready()
             return
         
-        block = self.task_state.assistant_message_content[self.task_state.current_streaming_content_index]
-        
-        if isinstance(block, ToolUseBlock) and not block.partial:
-            print(f"\n🔧 {block.name}")
+        while self.task_state.current_streaming_content_index < len(self.task_state.assistant_message_content):
+            block = self.task_state.assistant_message_content[self.task_state.current_streaming_content_index]
             
-            if block.name == "attempt_completion":
-                result = block.params.get('result', 'Task completed')
-                print(f"✅ {result}")
+            if isinstance(block, ToolUseBlock) and not block.partial:
+                print(f"\n🔧 {block.name}")
                 
-                next_task = input("\nNext task (or 'quit' to exit): ").strip()
-                if next_task.lower() in ['quit', 'exit', 'q']:
-                    self.task_state.abort = True
-                elif next_task:
-                    # Store the next task for the main loop to handle
-                    self.next_task = next_task
-                    self.task_state.abort = True  # Exit current conversation but continue to next task
-                else:
-                    # No input given, treat as task completion
-                    self.task_state.abort = True
+                if block.name == "attempt_completion":
+                    result = block.params.get('result', 'Task completed')
+                    print(f"✅ {result}")
+                    
+                    next_task = (await ainput("\nNext task (or 'quit' to exit): ")).strip()
+                    if next_task.lower() in ['quit', 'exit', 'q']:
+                        self.task_state.abort = True
+                    elif next_task:
+                        # Store the next task for the main loop to handle
+                        self.next_task = next_task
+                        self.task_state.abort = True  # Exit current conversation but continue to next task
+                    else:
+                        # No input given, treat as task completion
+                        self.task_state.abort = True
+                    
+                    self._mark_user_message_content_ready()
+                    return
+                
+                result = await self.tool_executor.execute_tool(block)
+                print(f"📋 {result}")
                 
-                self.task_state.user_message_content_ready = True
-                return
+                self.task_state.user_message_content.append({
+                    "type": "text",
+                    "text": f"Tool {block.name} result:\n{result}"
+                })
             
-            result = await self.tool_executor.execute_tool(block)
-            print(f"📋 {result}")
+            if block.partial:
+                break
             
-            self.task_state.user_message_content.append({
-                "type": "text",
-                "text": f"Tool {block.name} result:\n{result}"
-            })
-        
-        if not block.partial:
             if self.task_state.current_streaming_content_index == len(self.task_state.assistant_message_content) - 1:
-                self.task_state.user_message_content_ready = True
+                self._mark_user_message_content_ready()
             
             self.task_state.current_streaming_content_index += 1
-            
-            if self.task_state.current_streaming_content_index < len(self.task_state.assistant_message_content):
-                await self._present_content()
 
 
 async def main():
     print("🤖 Cline Core - Minimal")
     
+    # One provider (and its connection pool) is shared by every task
     try:
         api_provider = AnthropicAPIProvider()
+        if os.getenv('CLINE_CACHE_RESPONSES'):
+            api_provider = CachingAPIProvider(api_provider)
     except Exception as e:
         print(f"❌ {e}")
         return
     
     while True:
-        task_input = input("\n🎯 Task (or 'quit'): ").strip()
+        task_input = (await ainput("\n🎯 Task (or 'quit'): ")).strip()
         if not task_input or task_input.lower() in ['quit', 'exit']:
             break
         